@@ -41,10 +41,21 @@ About
 '''
 
 from gurobipy import *
+import collections
+import functools
 import itertools
-import random
-import copy
+import os
+from concurrent.futures import ProcessPoolExecutor, as_completed
 import pickle
+import numpy as np
+import scipy.sparse as sp
+
+try:
+  from numba import njit
+except ImportError:
+  # No numba, so the kernels below just run as plain Python.
+  def njit(*args, **kwargs):
+    return lambda f: f
 
 
 # Try adding the schedule constraint and runnign again...
@@ -60,7 +71,122 @@ import pickle
 
 '''
 
-def gen_instance(num_players, num_tasks, uniform=False):
+# Solver settings for the runtime sweep.  We care about getting to a good
+# incumbent fast rather than spending time on weak cuts.
+SOLVER_PARAMS = { 'MIPFocus' : 1,
+                  'Cuts'     : 0,
+                  'Presolve' : 1,
+                  'Method'   : 2
+                }
+
+# Warm start each sweep sample from the previous schedule its worker found.
+# Off for benchmark runs: which sample a worker saw last depends on process
+# scheduling, so recorded runtimes would not be reproducible.
+WARM_START = False
+
+@functools.lru_cache(maxsize=None)
+def _task_layout(num_players, num_tasks):
+  '''
+  Integer ids for an instance with num_players and num_tasks.  These only
+  depend on the sizes so they are cached across calls.
+
+  Parameters
+  -----------
+  num_players: Integer
+    Number of players.
+  num_tasks: Integer
+    Number of tasks
+
+  Returns
+  -----------
+    time_steps: tuple
+      The time step ids 0...num_tasks-1.
+
+    tasks: tuple
+      (player id, tuple of that player's task ids) pairs.  Player i
+      owns tasks i*num_tasks...(i+1)*num_tasks-1.
+
+    all_tasks: tuple
+      Every task id in player order, i.e., 0...num_players*num_tasks-1.
+
+    vt_pairs: tuple
+      Every (task, time step) pair in variable order.
+
+  Notes
+  -----------
+    Everything is a tuple so the cached copy can't be changed by a caller.
+    See instance_labels for the matching human readable names.
+  '''
+  time_steps = tuple(range(num_tasks))
+  tasks = tuple((i, tuple(range(i*num_tasks, (i+1)*num_tasks)))
+                  for i in range(num_players))
+  all_tasks = tuple(range(num_players*num_tasks))
+  vt_pairs = tuple(itertools.product(all_tasks, time_steps))
+  return time_steps, tasks, all_tasks, vt_pairs
+
+
+@functools.lru_cache(maxsize=None)
+def instance_labels(num_players, num_tasks):
+  '''
+  Human readable names for the ids used by gen_instance.
+
+  Parameters
+  -----------
+  num_players: Integer
+    Number of players.
+  num_tasks: Integer
+    Number of tasks
+
+  Returns
+  -----------
+    labels: tuple
+      (time step names, player names, task names), each a tuple indexed
+      by id.  Names follow the ts_x, Px, and Px_Ty conventions.
+
+  Notes
+  -----------
+
+  '''
+  # Generate time steps with naming convention ts_x
+  time_steps = tuple('ts_'+str(i) for i in range(1, num_tasks+1))
+
+  # Generate players and tasks with naming convention Px and Px_Ty.
+  players = tuple("P"+str(i) for i in range(1, num_players+1))
+  tasks = tuple("P"+str(i)+"_T"+str(j) for i in range(1, num_players+1)
+                  for j in range(1, num_tasks+1))
+  return time_steps, players, tasks
+
+
+@njit(cache=True)
+def _gen_edges(rand_r, rand_keep):
+  '''
+  Edge generation kernel for gen_instance.
+
+  Parameters
+  -----------
+  rand_r: numpy array
+    How many following positions each position may point at, in 1...5.
+  rand_keep: numpy array
+    An n x 5 boolean array of which of those edges to keep.
+
+  Returns
+  -----------
+    pairs: numpy array
+      A k x 2 array of (i,j) permutation positions with i < j.
+  '''
+  n = rand_r.shape[0]
+  out = np.empty((5*n, 2), np.int64)
+  k = 0
+  for i in range(n-1):
+    for r in range(rand_r[i]):
+      if i+r+2 < n and rand_keep[i,r]:
+        out[k,0] = i
+        out[k,1] = i+r+1
+        k += 1
+  return out[:k]
+
+
+def gen_instance(num_players, num_tasks, uniform=False, rng=None):
   '''
   Generate an instance of an ISG with num_players and num_tasks
 
@@ -70,60 +196,59 @@ def gen_instance(num_players, num_tasks, uniform=False):
     Number of players.
   num_tasks: Integer
     Number of tasks
+  uniform: Boolean
+    If True every task has reward 1.
+  rng: numpy Generator
+    Source of randomness.  A fresh default_rng() if not given.
 
   Returns
   -----------
     time_steps: list
-      A list of labels for the time steps.  Makes life easier.
+      The time step ids 0...num_tasks-1.
 
     tasks: Dictionary
-      A dictionary of player --> tasks where tasks is a list of tasks
-      for the player key.
+      A dictionary of player --> tasks where tasks is a list of task ids
+      for the player key.  Player i owns tasks i*num_tasks...(i+1)*num_tasks-1.
 
-      e.g.,
-      tasks = { 'a' : ['Ta1', 'Ta2', 'Ta3', 'Ta4'],
-                'b' : ['Tb1', 'Tb2', 'Tb3', 'Tb4']
+      e.g., for 2 players and 3 tasks,
+      tasks = { 0 : [0, 1, 2],
+                1 : [3, 4, 5]
               }
 
-      rewards: Dictionary
-        A dict from every task present in tasks to an integer or
-        real valued reward. e.g.
-          rewards = { 'Ta1' : 10,
-                      'Ta2' : 20,
-                      'Ta3' : 30
-                    }
+      all_tasks: list
+        Every task in player order, i.e., the values of tasks chained.
+
+      rewards: list
+        The integer reward of every task, indexed by task id.
 
       edges: list of tuple
         Precidence constraints.  (e,v) implies that e --> v or
         that e must preceede v... that e enables the service to commence
         on v.  e.g.
           edges = [
-               ('Ta1', 'Ta2'),
-               ('Tb2', 'Tb4')
+               (0, 1),
+               (3, 5)
              ]
   Notes
   -----------
-
+    Duplicate and transitively implied edges are dropped since the
+    precedence constraints are transitive anyway.  Players, tasks and time
+    steps are dense integer ids; instance_labels gives their names.
   '''
 
-  # Generate time steps with naming convention ts_x
-  time_steps = ['ts_'+str(i) for i in range(1, num_tasks+1)]
-
-  # Generate tasks with naming convention Px_Ty.
-  tasks = {}
-  for i in range(1, num_players+1):
-    t = ["P"+str(i)+"_T"+str(j) for j in range(1,num_tasks+1)]
-    tasks["P"+str(i)] = t
+  layout_time_steps, layout_tasks, all_tasks, _ = _task_layout(num_players, num_tasks)
+  time_steps = list(layout_time_steps)
+  tasks = {p: list(pt) for p,pt in layout_tasks}
+  n = len(all_tasks)
 
-  all_tasks = list(itertools.chain.from_iterable(list(tasks.values())))
+  if rng is None:
+    rng = np.random.default_rng()
 
   # Generate the rewards.
-  rewards = {}
-  for i in all_tasks:
-    if not uniform:
-      rewards[i] = random.randint(50,100)
-    else:
-      rewards[i] = 1
+  if not uniform:
+    rewards = rng.integers(50, 101, size=n).tolist()
+  else:
+    rewards = [1] * n
 
   # # Permute the edges randomly.. then p0 --> p1 with 50% chance. for
   # # all pairs...
@@ -137,28 +262,66 @@ def gen_instance(num_players, num_tasks, uniform=False):
 
   # Permute the Edges Randomly then for r randomly in 1...R,
   # Generate p ---> p+r with probability 0.50 each.
-  edges = []
-  pop_list = copy.copy(all_tasks)
-  random.shuffle(pop_list)
+  # All the draws are made up front; position i in the permutation may point
+  # at i+r+1 as long as i+r+2 < n, the same window the old pop loop used.
+  perm = rng.permutation(n).tolist()
+  rand_r = rng.integers(1, 6, size=n)
+  rand_keep = rng.integers(0, 4, size=(n, 5)) > 1
+  pairs = [tuple(e) for e in _gen_edges(rand_r, rand_keep).tolist()]
 
-  # print(pop_list)
-  while len(pop_list) > 1:
-    t0 = pop_list.pop(0)
-    # d = str(t0)
-    for r in range(random.randint(1, 5)):
-      if len(pop_list) > r+1:
-        if random.randint(0,3) > 1:
-          edges.append((t0, pop_list[r]))
-          # d += " --> " + str(pop_list[r])
-    # print(d)
+  # Implied edges only add constraints, so keep the Hasse diagram.
+  pairs = transitive_reduction(pairs, n)
+  edges = [(perm[i], perm[j]) for i,j in pairs]
 
-  return time_steps, tasks, rewards, edges
+  return time_steps, tasks, list(all_tasks), rewards, edges
 
 
-def model_isg(time_steps, tasks, rewards, edges):
+def transitive_reduction(pairs, n):
   '''
-  Generate a model of the ISG with the given task set,
-  rewards, and edges between tasks.
+  Drop duplicate and transitively implied edges from a DAG whose nodes
+  0...n-1 are already in topological order.
+
+  Parameters
+  -----------
+    pairs: list of tuple
+      Edges (i,j) with i < j.
+
+    n: Integer
+      Number of nodes.
+
+  Returns
+  -----------
+    pairs: list of tuple
+      The edges of the transitive reduction, sorted.
+
+  Notes
+  -----------
+    Nodes are visited from last to first, keeping the set of nodes reachable
+    from each as an integer bitmask.  Taking a node's successors in order
+    means any longer path to j has already been seen by the time we get to
+    the direct edge (i,j).
+  '''
+  succ = [[] for _ in range(n)]
+  for i,j in set(pairs):
+    succ[i].append(j)
+
+  reach = [0] * n
+  kept = []
+  for i in reversed(range(n)):
+    r = 0
+    for j in sorted(succ[i]):
+      if not (r >> j) & 1:
+        kept.append((i,j))
+        r |= (1 << j) | reach[j]
+    reach[i] = r
+  return sorted(kept)
+
+
+def build_skeleton(time_steps, tasks, all_tasks, layout=None, debug=False, env=None):
+  '''
+  Build the part of the ISG model that only depends on the players, their
+  tasks, and the time steps.  Rewards and edges are loaded afterwards with
+  set_instance so one skeleton can be reused across many samples.
 
   Parameters
   -----------
@@ -169,77 +332,254 @@ def model_isg(time_steps, tasks, rewards, edges):
       A dictionary of player --> tasks where tasks is a list of tasks
       for the player key.
 
-      e.g.,
-      tasks = { 'a' : ['Ta1', 'Ta2', 'Ta3', 'Ta4'],
-                'b' : ['Tb1', 'Tb2', 'Tb3', 'Tb4']
-              }
+    all_tasks: list
+      Every task in tasks, in player order.
 
-      rewards: Dictionary
-        A dict from every task present in tasks to an integer or
-        real valued reward. e.g.
-          rewards = { 'Ta1' : 10,
-                      'Ta2' : 20,
-                      'Ta3' : 30
-                    }
+    layout: tuple
+      The matching _task_layout, if there is one.  Saves working out
+      the (task, time step) list again.
 
-      edges: list of tuple
-        Precidence constraints.  (e,v) implies that e --> v or
-        that e must preceede v... that e enables the service to commence
-        on v.  e.g.
-          edges = [
-               ('Ta1', 'Ta2'),
-               ('Tb2', 'Tb4')
-             ]
+    debug: Boolean
+      Name the variables and constraints.  Off by default since the
+      names are only useful when writing out or inspecting the model.
+
+    env: Gurobi Env
+      Environment to build the model in.  The default environment if None.
 
   Returns
   -----------
     model: Gurobi Model
-      A MIP model of the ISG game with the given parameters.
+      A MIP model with the variables, scheduling, and active time
+      constraints in place but no edges or objective.
+
+    scheduled_times: tupledict
+      The (task, time step) scheduling variables.
 
   Notes
   -----------
-
+    The active time variables and the current edge and symmetry breaking
+    constraints are kept on the model as m._active_times, m._edge_constrs,
+    and m._sym_constrs.
   '''
-  m = Model('ISG')
+  m = Model('ISG', env=env)
 
-  scheduled_times = {}
-  active_times = {}
   # Make variables for all scheduled times and active times for all tasks.
-  all_tasks = list(itertools.chain.from_iterable(list(tasks.values())))
-
-  for v,t in itertools.product(all_tasks, time_steps):
-    scheduled_times[v,t] = m.addVar(vtype=GRB.BINARY, name='s_%s_%s' % (v, t))
-    active_times[v,t] = m.addVar(vtype=GRB.BINARY, name='a_%s_%s' % (v, t))
+  if layout is None:
+    vt_pairs = list(itertools.product(all_tasks, time_steps))
+  else:
+    vt_pairs = layout[3]
 
-  m.update()
+  scheduled_times = m.addVars(all_tasks, time_steps, vtype=GRB.BINARY, name='s' if debug else '')
+  active_times = m.addVars(all_tasks, time_steps, vtype=GRB.BINARY, name='a' if debug else '')
 
   # Every task is only scheduled once.
-  for v in all_tasks:
-    m.addConstr(quicksum(scheduled_times[v,t] for t in time_steps) == 1, 'st_%s%s' % (v,t))
+  m.addConstrs((scheduled_times.sum(v, '*') == 1 for v in all_tasks), name='st' if debug else '')
 
   # For the set of each player's tasks, there is only one task per time step.
-  for p,pt in tasks.items():
-    for t in time_steps:
-      m.addConstr(quicksum(scheduled_times[v,t] for v in pt) == 1, 'pl_%s_at_time_%s' % (p,t))
+  # Note that sum('*', t) would run over every player so we sum over tasks[p] here.
+  m.addConstrs((quicksum(scheduled_times[v,t] for v in tasks[p]) == 1
+                  for p in tasks for t in time_steps), name='pl' if debug else '')
+
+  # The active link and edge families are added as sparse matrices over
+  # these variable lists, both in vt_pairs order.
+  num_steps = len(time_steps)
+  s_vars = [scheduled_times[vt] for vt in vt_pairs]
+  a_vars = [active_times[vt] for vt in vt_pairs]
 
   # Link active times to scheduled times.
-  for v in all_tasks:
-    for i,t in enumerate(time_steps):
-      m.addConstr(quicksum(scheduled_times[v, time_steps[j]] for j in range(i+1)) >= active_times[v,t], 'act_time%s%s' % (v,t))
+  # Each task's block of rows is a lower triangle of ones over its scheduled
+  # times (the prefix sums) minus its active times.
+  prefix = sp.kron(sp.identity(len(all_tasks), format='csr'),
+                   sp.tril(np.ones((num_steps, num_steps))), format='csr')
+  link = sp.hstack([prefix, -sp.identity(len(vt_pairs), format='csr')], format='csr')
+  m.addMConstr(link, s_vars + a_vars, GRB.GREATER_EQUAL, np.zeros(len(vt_pairs)),
+               name=['act_%s_%s' % vt for vt in vt_pairs] if debug else '')
+
+  m._tasks = tasks
+  m._task_index = {v: i for i,v in enumerate(all_tasks)}
+  m._a_vars = a_vars
+  m._vt_pairs = vt_pairs
+  m._time_steps = time_steps
+  m._scheduled_times = scheduled_times
+  m._active_times = active_times
+  m._edge_constrs = None
+  m._sym_groups = []
+  m._sym_constrs = []
+  m._debug = debug
+  return m, scheduled_times
+
+
+def set_instance(m, rewards, edges, lazy=1, symmetry=True):
+  '''
+  Load the rewards and edges of an instance into a model made by
+  build_skeleton, replacing whatever instance was there before.
+
+  Parameters
+  -----------
+    m: gurobi model
+      A model returned by build_skeleton.
+
+    rewards: list
+      The reward of every task, indexed by task id as from gen_instance.
+      A dict from task label to reward works the same for hand labelled
+      instances.
+
+    edges: list of tuple
+      Precidence constraints between task ids (or labels).  (e,v) implies
+      that e --> v.
+
+    lazy: Integer
+      Lazy attribute for the edge constraints.  The default of 1 keeps
+      them out of the LP until a candidate solution violates one; 0 makes
+      them ordinary constraints.
+
+    symmetry: Boolean
+      Add symmetry breaking constraints, see below.
+
+  Returns
+  -----------
+    nothing.
 
-  # Obey Edge Constraints...
-  for e in edges:
-    for t in time_steps:
-      m.addConstr(active_times[e[1], t] <= active_times[e[0],t], 'edge_%s_to_%s_%s' % (e[0], e[1], t))
+  Notes
+  -----------
+    The model is reset so the next optimize() starts from scratch.
+
+    Two tasks of the same player with the same reward and no edges can
+    swap time steps without changing anything, so we only allow the
+    earlier one (in tasks order) to start first.  The groups of such
+    tasks are kept on the model as m._sym_groups.
+  '''
+  if m.status != GRB.Status.LOADED:
+    m.reset()
+  active_times = m._active_times
+  time_steps = m._time_steps
+
+  # Swap out the Edge Constraints...
+  # Row e*|T|+i reads a[v,t_i] - a[u,t_i] <= 0 for the e-th edge (u,v).
+  if m._edge_constrs is not None:
+    m.remove(m._edge_constrs)
+    m._edge_constrs = None
+  if edges:
+    num_steps = len(time_steps)
+    num_rows = len(edges) * num_steps
+    steps = np.arange(num_steps)
+    src = np.array([m._task_index[u] for u,_ in edges])
+    dst = np.array([m._task_index[v] for _,v in edges])
+    rows = np.arange(num_rows)
+    cols = np.concatenate([(dst[:,None]*num_steps + steps).ravel(),
+                           (src[:,None]*num_steps + steps).ravel()])
+    vals = np.concatenate([np.ones(num_rows), -np.ones(num_rows)])
+    A = sp.csr_matrix((vals, (np.concatenate([rows, rows]), cols)),
+                      shape=(num_rows, len(m._a_vars)))
+    names = ''
+    if m._debug:
+      names = ['edge_%s_%s_%s' % (u,v,t) for u,v in edges for t in time_steps]
+    m._edge_constrs = m.addMConstr(A, m._a_vars, GRB.LESS_EQUAL, np.zeros(num_rows), name=names)
+    if lazy:
+      m._edge_constrs.Lazy = lazy
+
+  # Swap out the Symmetry Breaking Constraints...
+  if m._sym_constrs:
+    m.remove(m._sym_constrs)
+  m._sym_groups = []
+  m._sym_constrs = []
+  if symmetry:
+    in_edge = set(itertools.chain.from_iterable(edges))
+    for pt in m._tasks.values():
+      groups = collections.defaultdict(list)
+      for v in pt:
+        if v not in in_edge:
+          groups[rewards[v]].append(v)
+      m._sym_groups.extend(g for g in groups.values() if len(g) > 1)
+
+    scheduled_times = m._scheduled_times
+    steps = list(range(len(time_steps)))
+    start = {}
+    for g in m._sym_groups:
+      for v in g:
+        start[v] = LinExpr(steps, [scheduled_times[v,t] for t in time_steps])
+      for u,w in zip(g, g[1:]):
+        m._sym_constrs.append(m.addConstr(start[u] <= start[w],
+                                          ('sym_%s_%s' % (u,w)) if m._debug else ''))
 
   # Set The model Objective...
-  m.setObjective(quicksum(active_times[v,t] * rewards[v] for v,t in itertools.product(all_tasks, time_steps)), GRB.MAXIMIZE)
+  coef = {vt: rewards[vt[0]] for vt in m._vt_pairs}
+  m.setObjective(active_times.prod(coef), GRB.MAXIMIZE)
 
   m.update()
+
+
+def model_isg(time_steps, tasks, all_tasks, rewards, edges, layout=None, debug=False, lazy=1, symmetry=True):
+  '''
+  Generate a model of the ISG with the given task set,
+  rewards, and edges between tasks.
+
+  Parameters
+  -----------
+    time_steps: list
+      The time step ids 0...|T|-1 from gen_instance.
+
+    tasks: Dictionary
+      A dictionary of player --> tasks where tasks is a list of task ids
+      for the player key.
+
+      e.g., for 2 players and 3 tasks,
+      tasks = { 0 : [0, 1, 2],
+                1 : [3, 4, 5]
+              }
+
+      all_tasks: list
+        Every task id in tasks, in player order.  e.g.
+          all_tasks = [0, 1, 2, 3, 4, 5]
+
+      rewards: list
+        The integer or real valued reward of every task, indexed by
+        task id. e.g.
+          rewards = [10, 20, 30, 15, 25, 35]
+
+      edges: list of tuple
+        Precidence constraints.  (e,v) implies that e --> v or
+        that e must preceede v... that e enables the service to commence
+        on v.  e.g.
+          edges = [
+               (0, 1),
+               (3, 5)
+             ]
+
+      layout: tuple
+        The matching _task_layout, if there is one.
+
+      debug: Boolean
+        Name the variables and constraints.
+
+      lazy: Integer
+        Lazy attribute for the edge constraints, see set_instance.
+
+      symmetry: Boolean
+        Add symmetry breaking constraints, see set_instance.
+
+  Returns
+  -----------
+    model: Gurobi Model
+      A MIP model of the ISG game with the given parameters.
+
+  Notes
+  -----------
+    Equivalent to build_skeleton followed by set_instance.
+
+    Hand labelled instances work too, since tasks and time steps are only
+    used as keys.  Pass any hashable labels and a dict for rewards, e.g.
+      tasks = { 'a' : ['Ta1', 'Ta2'], 'b' : ['Tb1', 'Tb2'] }
+      all_tasks = ['Ta1', 'Ta2', 'Tb1', 'Tb2']
+      rewards = { 'Ta1' : 10, 'Ta2' : 20, 'Tb1' : 30, 'Tb2' : 40 }
+      edges = [ ('Ta1', 'Tb2') ]
+  '''
+  m, scheduled_times = build_skeleton(time_steps, tasks, all_tasks, layout, debug)
+  set_instance(m, rewards, edges, lazy, symmetry)
   return m, scheduled_times
 
 
-def pretty_print_solution(m, time_steps, tasks, scheduled_times):
+def pretty_print_solution(m, time_steps, tasks, scheduled_times, labels=None):
   '''
   Pretty print the solution.
 
@@ -250,6 +590,11 @@ def pretty_print_solution(m, time_steps, tasks, scheduled_times):
     time_steps: list
       A list of labels for the time steps.  Makes life easier.
 
+    labels: tuple
+      (time step names, player names, task names) as returned by
+      instance_labels for an instance from gen_instance.  Without it the
+      keys are printed as they are.
+
   Returns
   -----------
     nothing.
@@ -263,53 +608,245 @@ def pretty_print_solution(m, time_steps, tasks, scheduled_times):
     print("Finished in (seconds): " + str(m.Runtime))
     print("Schedule Utility: " + str(m.ObjVal))
 
-    solution = m.getAttr('x', scheduled_times)
+    if labels is None:
+      ts_name = player_name = task_name = str
+    else:
+      ts_name, player_name, task_name = (l.__getitem__ for l in labels)
+
+    # Invert the solution once into player --> time step --> task.
+    owner = {v: p for p,pt in tasks.items() for v in pt}
+    assignment = {p: {} for p in tasks}
+    for (v,t),val in m.getAttr('x', scheduled_times).items():
+      if val > 0.5:
+        assignment[owner[v]][t] = v
+
     # Pretty Print...
-    print("\t\t" + "\t".join(time_steps))
+    print("\t\t" + "\t".join(ts_name(t) for t in time_steps))
     for p in sorted(tasks.keys()):
-      outstr = "Player: " + str(p) + "\t"
+      outstr = "Player: " + player_name(p) + "\t"
       for t in time_steps:
-        for ct in tasks[p]:
-          if solution[ct,t] == 1.0:
-            outstr += ct + "\t"
+        if t in assignment[p]:
+          outstr += task_name(assignment[p][t]) + "\t"
       print(outstr)
   else:
     print("No Solution")
 
 
-if __name__ == "__main__":
-  results = {}
-  uniform_results = {}
-  range_num_players = [2, 5, 10]
-  range_num_tasks = [5, 10, 30, 50, 70, 100]
-  samples = 100
-  for p,t in itertools.product(range_num_players, range_num_tasks):
-    print("On: " + str(p) + " players and " + str(t) + " tasks.")
-    for s in range(samples):
-      time_steps, tasks, rewards, edges = gen_instance(p, t)
-      model, scheduled_times = model_isg(time_steps, tasks, rewards, edges)
-      # Quiet down the Optimizer...
-      model.setParam( 'OutputFlag', False )
-      model.optimize()
-      # pretty_print_solution(model, time_steps, tasks, scheduled_times)
-      # print(model.Runtime)
-      results[(p,t)] = results.get((p,t), []) + [model.Runtime]
+def set_solver_params(m, threads=0):
+  '''
+  Apply the SOLVER_PARAMS settings to a model.
+
+  Parameters
+  -----------
+    m: gurobi model
+
+    threads: Integer
+      Number of threads Gurobi may use.  The default of 0 lets Gurobi
+      use all cores.
 
-      time_steps, tasks, rewards, edges = gen_instance(p, t, uniform=True)
-      model, scheduled_times = model_isg(time_steps, tasks, rewards, edges)
-      # Quiet down the Optimizer...
-      model.setParam( 'OutputFlag', False )
-      model.optimize()
-      # pretty_print_solution(model, time_steps, tasks, scheduled_times)
-      # print(model.Runtime)
-      uniform_results[(p,t)] = uniform_results.get((p,t), []) + [model.Runtime]
+  Returns
+  -----------
+    nothing.
+
+  Notes
+  -----------
+
+  '''
+  m.setParam('Threads', threads)
+  for k,v in SOLVER_PARAMS.items():
+    m.setParam(k, v)
 
-  with open("./stepping_run.pickle", 'wb') as output_file:
-    pickle.dump(results, output_file)
-  with open("./stepping_run_uniform.pickle", 'wb') as output_file:
-    pickle.dump(uniform_results, output_file)
 
+def order_start(m, start):
+  '''
+  Reorder a schedule so it satisfies the symmetry breaking constraints
+  of the instance currently loaded in m.
 
+  Parameters
+  -----------
+    m: gurobi model
+      A model returned by build_skeleton, after set_instance.
 
+    start: Dictionary
+      (task, time step) --> value for every scheduling variable.
 
+  Returns
+  -----------
+    start: Dictionary
+      A copy of start where each symmetric group of tasks takes the same
+      time steps as before, in group order.
+
+  Notes
+  -----------
+
+  '''
+  start = dict(start)
+  time_steps = m._time_steps
+  for g in m._sym_groups:
+    slots = [i for v in g for i,t in enumerate(time_steps) if start[v,t] > 0.5]
+    if len(slots) != len(g):
+      continue
+    for v in g:
+      for t in time_steps:
+        start[v,t] = 0.0
+    for v,i in zip(g, sorted(slots)):
+      start[v,time_steps[i]] = 1.0
+  return start
+
+
+# The most recent skeleton built in this process, keyed on (players, tasks).
+_skeleton = None
+# The Gurobi environment shared by every model built in this process.
+_env = None
+
+def _init_worker():
+  '''
+  Start one quiet Gurobi environment per worker process so the license
+  check and environment setup happen once rather than once per model.
+  '''
+  global _env
+  _env = Env(empty=True)
+  _env.setParam('OutputFlag', 0)
+  _env.start()
+
+
+def run_one(args):
+  '''
+  Generate and solve a single sample of the runtime sweep.
+
+  Parameters
+  -----------
+    args: tuple
+      (num_players, num_tasks, uniform) for the sample.
+
+  Returns
+  -----------
+    (num_players, num_tasks, uniform, runtime) for the solved sample.
+
+  Notes
+  -----------
+    Runs inside a worker process so Gurobi is limited to one thread;
+    the parallelism comes from running many samples at once.  Consecutive
+    samples with the same size reuse the worker's model skeleton.  With
+    WARM_START set they are also warm started from the previous sample's
+    schedule.
+  '''
+  global _skeleton
+  p, t, uniform = args
+  time_steps, tasks, all_tasks, rewards, edges = gen_instance(p, t, uniform=uniform)
+  if _skeleton is None or _skeleton[0] != (p,t):
+    model, scheduled_times = build_skeleton(time_steps, tasks, all_tasks, _task_layout(p, t),
+                                            debug=False, env=_env)
+    # Quiet down the Optimizer...
+    model.setParam( 'OutputFlag', False )
+    set_solver_params(model, threads=1)
+    model._start = None
+    _skeleton = ((p,t), model, scheduled_times)
+  _, model, scheduled_times = _skeleton
+  set_instance(model, rewards, edges)
+  # Any schedule is feasible for any instance of this size, so start
+  # from the last one this worker found.
+  if WARM_START and model._start is not None:
+    model.setAttr('Start', scheduled_times, order_start(model, model._start))
+  model.optimize()
+  if WARM_START and model.SolCount > 0:
+    model._start = model.getAttr('X', scheduled_times)
+  # pretty_print_solution(model, time_steps, tasks, scheduled_times, instance_labels(p, t))
+  return p, t, uniform, model.Runtime
+
+
+def read_results(input_file):
+  '''
+  Iterate over the records in a results file written by the sweep.
+
+  Parameters
+  -----------
+    input_file: file
+      The results file, opened for binary reading.
+
+  Returns
+  -----------
+    A generator of (num_players, num_tasks, uniform, runtime) records.
+
+  Notes
+  -----------
+    Stops at the end of the file or at a record cut short by an interrupted
+    run, leaving the file positioned just after the last complete record.
+  '''
+  while True:
+    pos = input_file.tell()
+    try:
+      yield pickle.load(input_file)
+    except (EOFError, pickle.UnpicklingError):
+      input_file.seek(pos)
+      return
+
+
+def load_results(path):
+  '''
+  Collect a results file into the dictionaries the graphing notebook uses.
+
+  Parameters
+  -----------
+    path: string
+      A results file written by the sweep.
+
+  Returns
+  -----------
+    results: Dictionary
+      (num_players, num_tasks) --> list of runtimes for the random rewards.
+
+    uniform_results: Dictionary
+      (num_players, num_tasks) --> list of runtimes for the uniform rewards.
+
+  Notes
+  -----------
+
+  '''
+  results = collections.defaultdict(list)
+  uniform_results = collections.defaultdict(list)
+  with open(path, 'rb') as input_file:
+    for p,t,uniform,runtime in read_results(input_file):
+      if not uniform:
+        results[(p,t)].append(runtime)
+      else:
+        uniform_results[(p,t)].append(runtime)
+  return dict(results), dict(uniform_results)
+
+
+if __name__ == "__main__":
+  results_file = "./stepping_run.pkl"
+  range_num_players = [2, 5, 10]
+  range_num_tasks = [5, 10, 30, 50, 70, 100]
+  samples = 100
 
+  # Pick up where an earlier run left off.
+  done = collections.Counter()
+  if os.path.exists(results_file):
+    with open(results_file, 'r+b') as input_file:
+      for p,t,uniform,_ in read_results(input_file):
+        done[(p,t,uniform)] += 1
+      # Drop a record cut short by an interrupted run.
+      input_file.truncate(input_file.tell())
+
+  work = [(p,t,u) for p,t in itertools.product(range_num_players, range_num_tasks)
+            for u in (False, True) for _ in range(samples - done[(p,t,u)])]
+  with open(results_file, 'ab') as output_file, \
+       ProcessPoolExecutor(max_workers=os.cpu_count(), initializer=_init_worker) as executor:
+    # Write each record as soon as its sample finishes, not in submission
+    # order, so one slow solve can't hold finished samples in memory.
+    futures = [executor.submit(run_one, w) for w in work]
+    try:
+      for future in as_completed(futures):
+        record = future.result()
+        pickle.dump(record, output_file, protocol=pickle.HIGHEST_PROTOCOL)
+        output_file.flush()
+        p, t, uniform, _ = record
+        done[(p,t,uniform)] += 1
+        if done[(p,t,False)] + done[(p,t,True)] == 2*samples:
+          print("Done: " + str(p) + " players and " + str(t) + " tasks.")
+    except BaseException:
+      # A failed sample or Ctrl-C: drop the queued samples instead of
+      # solving them all on the way out.  What's written can be resumed.
+      executor.shutdown(wait=False, cancel_futures=True)
+      raise